@@ -20,32 +20,49 @@ _DEFAULT_POLICIES = (
     AgePolicy(max_age=200, threshold=0.45, allow_unblock=True),   # older adults
 )
 
+# Ages below this resolve through a lookup table; it covers every age the API accepts.
+_TABLE_SIZE = 201
+
 
 class AgePolicyResolver:
     """Maps a user-provided age to an appropriate policy bucket."""
 
     def __init__(self, policies: Optional[tuple[AgePolicy, ...]] = None) -> None:
         self._policies = policies or _DEFAULT_POLICIES
+        self._default = self._policies[0]
+        self._last = self._policies[-1]
+        # Precompute the first matching policy for every age up to the largest bucket,
+        # capped so a huge ``max_age`` cannot blow up the table.
+        largest = max(policy.max_age for policy in self._policies)
+        size = min(max(largest + 1, 0), _TABLE_SIZE)
+        self._by_age: list[AgePolicy] = [
+            next(policy for policy in self._policies if age <= policy.max_age)
+            for age in range(size)
+        ]
+        # Ages past the table only need a scan if some bucket reaches beyond it.
+        self._scan_tail = largest >= size
 
     def resolve(self, age: Optional[int]) -> AgePolicy:
         """Return the policy matching ``age``; fall back to the strictest option."""
 
         if age is None:
-            return self._policies[0]
+            return self._default
 
         try:
             integer_age = int(age)
         except (TypeError, ValueError):
-            return self._policies[0]
+            return self._default
 
         if integer_age < 0:
-            return self._policies[0]
-
-        for policy in self._policies:
-            if integer_age <= policy.max_age:
-                return policy
-
-        return self._policies[-1]
+            return self._default
+
+        if integer_age < len(self._by_age):
+            return self._by_age[integer_age]
+        if self._scan_tail:
+            for policy in self._policies:
+                if integer_age <= policy.max_age:
+                    return policy
+        return self._last
 
 
 _resolver = AgePolicyResolver()
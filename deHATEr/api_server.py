@@ -1,28 +1,37 @@
 """FastAPI server that exposes the TransformerAgeAwareClassifier via HTTP."""
 from __future__ import annotations
 
+import asyncio
 import logging
 import os
 from pathlib import Path
-from typing import Optional
+from typing import Any, List, Optional, Tuple
 
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, field_validator
 
-from predict import TransformerAgeAwareClassifier
+from predict import TransformerAgeAwareClassifier, load_classifier
 
 logger = logging.getLogger(__name__)
 
+# Requests arriving within BATCH_WAIT_MS of each other share one forward pass.
+MAX_BATCH = int(os.getenv("MAX_BATCH", "32"))
+BATCH_WAIT_MS = float(os.getenv("BATCH_WAIT_MS", "5"))
+
+_PendingRequest = Tuple[str, Optional[int], "asyncio.Queue[Any]"]
+
 
 class PredictRequest(BaseModel):
     text: str = Field(..., description="Input text to classify")
     age: Optional[int] = Field(None, ge=0, le=130, description="Optional user age")
 
-    @validator("text")
+    @field_validator("text")
+    @classmethod
     def _validate_text(cls, value: str) -> str:
-        if not value or not value.strip():
+        stripped = value.strip()
+        if not stripped:
             raise ValueError("text must not be empty")
-        return value
+        return stripped
 
 
 class PredictResponse(BaseModel):
@@ -44,6 +53,10 @@ def _resolve_device() -> Optional[str]:
     return device_env if device_env else None
 
 
+def _resolve_backend() -> str:
+    return os.getenv("MODEL_BACKEND", "torch")
+
+
 app = FastAPI(title="4j3k Extension Inference API", version="0.1.0")
 
 
@@ -51,26 +64,119 @@ app = FastAPI(title="4j3k Extension Inference API", version="0.1.0")
 def _load_model() -> None:
     model_path = _resolve_model_path()
     device = _resolve_device()
-    logger.info("Loading model from %s", model_path)
-    app.state.classifier = TransformerAgeAwareClassifier(model_path, device=device)
+    backend = _resolve_backend()
+    logger.info("Loading model from %s (backend=%s)", model_path, backend)
+    app.state.classifier = load_classifier(model_path, device=device, backend=backend)
     logger.info("Model loaded; serving requests")
 
 
+@app.on_event("startup")
+async def _start_batcher() -> None:
+    app.state.queue = asyncio.Queue()
+    _spawn_batcher(app)
+
+
+@app.on_event("shutdown")
+async def _stop_batcher() -> None:
+    batcher = getattr(app.state, "batcher", None)
+    if batcher is not None:
+        batcher.cancel()
+
+
+def _spawn_batcher(app: FastAPI) -> None:
+    app.state.batcher = asyncio.create_task(_server_loop(app))
+    app.state.batcher.add_done_callback(lambda task: _on_batcher_done(app, task))
+
+
+def _on_batcher_done(app: FastAPI, task: "asyncio.Task[None]") -> None:
+    """Restart the batching loop if it died, so queued requests are not stranded."""
+
+    if task.cancelled():
+        return
+    exc = task.exception()
+    logger.error("Batching loop stopped unexpectedly; restarting", exc_info=exc)
+    _spawn_batcher(app)
+
+
+def _batcher_alive() -> bool:
+    batcher = getattr(app.state, "batcher", None)
+    return batcher is not None and not batcher.done()
+
+
+async def _collect_batch(queue: "asyncio.Queue[_PendingRequest]") -> List[_PendingRequest]:
+    """Wait for one request, then gather more until the batch is full or the window closes."""
+
+    loop = asyncio.get_running_loop()
+    batch = [await queue.get()]
+    deadline = loop.time() + BATCH_WAIT_MS / 1000.0
+    while len(batch) < MAX_BATCH:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            break
+        try:
+            batch.append(await asyncio.wait_for(queue.get(), timeout=remaining))
+        except asyncio.TimeoutError:
+            break
+    return batch
+
+
+def _classify_pending(
+    classifier: TransformerAgeAwareClassifier,
+    texts: List[str],
+    ages: List[Optional[int]],
+) -> List[Any]:
+    """Score a coalesced batch; if it fails, retry item by item so errors stay per request."""
+
+    try:
+        return classifier.classify_batch(texts, ages)
+    except Exception:  # pragma: no cover - defensive
+        logger.exception("Batched inference failed; retrying %d requests one by one", len(texts))
+
+    results: List[Any] = []
+    for text, age in zip(texts, ages):
+        try:
+            results.append(classifier.classify_batch([text], [age])[0])
+        except Exception as exc:  # pragma: no cover - defensive
+            logger.exception("Model inference failed")
+            results.append(exc)
+    return results
+
+
+async def _server_loop(app: FastAPI) -> None:
+    queue: "asyncio.Queue[_PendingRequest]" = app.state.queue
+    classifier: TransformerAgeAwareClassifier = app.state.classifier
+    while True:
+        batch = await _collect_batch(queue)
+        try:
+            texts = [text for text, _, _ in batch]
+            ages = [age for _, age, _ in batch]
+            results = await asyncio.to_thread(_classify_pending, classifier, texts, ages)
+            for (_, _, response_q), result in zip(batch, results):
+                response_q.put_nowait(result)
+        except BaseException as exc:
+            # Never leave a dequeued request waiting on a response that will not come.
+            error = exc if isinstance(exc, Exception) else RuntimeError("Batching loop stopped")
+            for _, _, response_q in batch:
+                if response_q.empty():
+                    response_q.put_nowait(error)
+            raise
+
+
 @app.post("/predict", response_model=PredictResponse)
-def predict(request: PredictRequest) -> PredictResponse:
-    classifier = getattr(app.state, "classifier", None)
-    if classifier is None:
+async def predict(request: PredictRequest) -> PredictResponse:
+    queue = getattr(app.state, "queue", None)
+    if getattr(app.state, "classifier", None) is None or queue is None or not _batcher_alive():
         raise HTTPException(status_code=503, detail="Model not ready")
 
-    try:
-        print(
-            f"[debug] /predict input: text={request.text!r}, age={request.age}",
-            flush=True,
-        )
-        result = classifier.classify(request.text, request.age)
-    except Exception as exc:  # pragma: no cover - defensive
-        logger.exception("Model inference failed")
-        raise HTTPException(status_code=500, detail=str(exc)) from exc
+    print(
+        f"[debug] /predict input: text={request.text!r}, age={request.age}",
+        flush=True,
+    )
+    response_q: "asyncio.Queue[Any]" = asyncio.Queue(1)
+    await queue.put((request.text, request.age, response_q))
+    result = await response_q.get()
+    if isinstance(result, Exception):
+        raise HTTPException(status_code=500, detail=str(result)) from result
 
     print(f"[debug] /predict output: {result}", flush=True)
     return PredictResponse(**result)
@@ -79,13 +185,15 @@ def predict(request: PredictRequest) -> PredictResponse:
 @app.get("/healthz")
 def healthcheck() -> dict:
     classifier = getattr(app.state, "classifier", None)
-    status = "ready" if classifier is not None else "loading"
+    status = "ready" if classifier is not None and _batcher_alive() else "loading"
     return {"status": status}
 
 
 if __name__ == "__main__":
     import uvicorn
 
+    # loop/http stay at uvicorn's "auto", which picks uvloop and httptools when
+    # uvicorn[standard] installed them and falls back to asyncio/h11 otherwise.
     uvicorn.run(
         "api_server:app",
         host=os.getenv("HOST", "127.0.0.1"),
@@ -2,14 +2,20 @@
 from __future__ import annotations
 
 import argparse
+import functools
+import os
+import threading
+from collections import OrderedDict
 from dataclasses import asdict
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Sequence, Union
 
 from contextlib import nullcontext
 
+import numpy as np
 import torch
-from transformers import AutoModelForSequenceClassification, AutoTokenizer
+from transformers import AutoConfig, AutoModelForSequenceClassification, AutoTokenizer
+from transformers.modeling_outputs import SequenceClassifierOutput
 
 from age_policy import AgePolicy, resolve_policy
 
@@ -18,7 +24,15 @@ try:  # Optional dependency for Windows DirectML acceleration
 except Exception:  # pragma: no cover - optional runtime import
     torch_directml = None
 
+try:  # Optional dependency for the ONNX Runtime backend
+    import onnxruntime as ort  # type: ignore
+except Exception:  # pragma: no cover - optional runtime import
+    ort = None
+
+BACKENDS = ("torch", "onnx")
+
 
+@functools.lru_cache(maxsize=4)
 def _load_tokenizer(model_name: str):
     try:
         return AutoTokenizer.from_pretrained(model_name)
@@ -30,6 +44,150 @@ def _load_tokenizer(model_name: str):
         return AutoTokenizer.from_pretrained(model_name, use_fast=False)
 
 
+def _load_model(model_name: str, dtype: torch.dtype) -> torch.nn.Module:
+    # Not cached: each classifier moves, converts and quantizes its own copy in place.
+    model = AutoModelForSequenceClassification.from_pretrained(model_name, torch_dtype=dtype)
+    model.eval()
+    return model
+
+
+def _fast_backend(tokenizer: Any, max_length: int) -> Any:
+    """Return a private copy of the Rust tokenizer configured for ``max_length``.
+
+    The copy keeps its own truncation and padding settings, which the Python
+    wrapper would otherwise rewrite on every call. Slow tokenizers, or ones
+    without a pad token, return ``None``.
+    """
+
+    backend = getattr(tokenizer, "backend_tokenizer", None)
+    if backend is None or tokenizer.pad_token_id is None:
+        return None
+    from tokenizers import Tokenizer
+
+    rust = Tokenizer.from_str(backend.to_str())
+    rust.enable_truncation(
+        max_length=max_length, direction=getattr(tokenizer, "truncation_side", "right")
+    )
+    rust.enable_padding(
+        pad_id=tokenizer.pad_token_id,
+        pad_token=tokenizer.pad_token,
+        direction=getattr(tokenizer, "padding_side", "right"),
+    )
+    return rust
+
+
+@functools.lru_cache(maxsize=32)
+def _policy_dict(policy: AgePolicy) -> Dict[str, Any]:
+    # Callers receive a copy; this one is shared by every response for ``policy``.
+    return asdict(policy)
+
+
+def _resolve_max_length(tokenizer: Any, config: Any) -> int:
+    max_len = getattr(tokenizer, "model_max_length", 512)
+    if not isinstance(max_len, int) or max_len <= 0 or max_len > 4096:
+        max_len = 512
+
+    config_max_positions = getattr(config, "max_position_embeddings", None)
+    if isinstance(config_max_positions, int) and config_max_positions > 2:
+        # Leave room for special tokens so position_ids stay within the embedding table.
+        max_len = min(max_len, config_max_positions - 2)
+
+    return max(max_len, 8)
+
+
+def _autocast_context(device: str, dtype: torch.dtype):
+    # Half-precision weights already run half-precision kernels; only FP32 weights need autocast.
+    if device == "cuda" and dtype == torch.float32:
+        return torch.autocast(device_type="cuda", dtype=torch.float16)
+    return nullcontext()
+
+
+_DTYPE_ALIASES = {
+    "float16": torch.float16,
+    "fp16": torch.float16,
+    "half": torch.float16,
+    "bfloat16": torch.bfloat16,
+    "bf16": torch.bfloat16,
+    "float32": torch.float32,
+    "fp32": torch.float32,
+    "float": torch.float32,
+}
+
+
+def _supports_bf16(device: str) -> bool:
+    if device == "cuda":
+        return torch.cuda.is_bf16_supported()
+    return device == "cpu"
+
+
+def _select_dtype(device: str) -> torch.dtype:
+    """Pick the weight dtype for ``device``; ``DEHATER_DTYPE`` overrides the default.
+
+    CUDA defaults to FP16. Everything else stays FP32 because half-precision CPU,
+    MPS and DirectML kernels are either slow or incomplete.
+    """
+
+    override = os.getenv("DEHATER_DTYPE", "").strip().lower()
+    if override and override != "auto":
+        if override not in _DTYPE_ALIASES:
+            raise ValueError(f"Unsupported DEHATER_DTYPE value '{override}'.")
+        dtype = _DTYPE_ALIASES[override]
+        if dtype == torch.bfloat16 and not _supports_bf16(device):
+            print(f"[dtype] bfloat16 not supported on {device}; using float32.", flush=True)
+            return torch.float32
+        return dtype
+    if device == "cuda":
+        return torch.float16
+    return torch.float32
+
+
+def _quantize_dynamic_int8(model: torch.nn.Module) -> torch.nn.Module:
+    """Swap ``nn.Linear`` weights for INT8 dynamic-quantized kernels (CPU only).
+
+    Embedding and LayerNorm modules are not ``nn.Linear`` and stay in FP32.
+    """
+
+    try:
+        quantized = torch.ao.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+    except (RuntimeError, AssertionError) as exc:
+        print(f"[quantize] INT8 dynamic quantization unavailable ({exc}); keeping FP32.", flush=True)
+        return model
+    converted = sum(
+        1
+        for module in quantized.modules()
+        if isinstance(module, torch.ao.nn.quantized.dynamic.Linear)
+    )
+    print(f"[quantize] Converted {converted} linear layers to INT8.", flush=True)
+    return quantized
+
+
+_cpu_runtime_configured = False
+
+
+def _configure_cpu_runtime() -> None:
+    """Apply the ``DEHATER_THREADS`` override to the process-wide CPU thread pools, once.
+
+    Without the env var, PyTorch keeps its own defaults.
+    """
+
+    global _cpu_runtime_configured
+    if _cpu_runtime_configured:
+        return
+    _cpu_runtime_configured = True
+
+    threads = os.getenv("DEHATER_THREADS")
+    if not threads:
+        return
+    torch.set_num_threads(int(threads))
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Only allowed before any inter-op parallel work has started.
+        pass
+
+
 def _has_directml() -> bool:
     if torch_directml is None:
         return False
@@ -40,19 +198,31 @@ def _has_directml() -> bool:
     return True
 
 
+def _cuda_ready() -> bool:
+    """Initialise the CUDA context without allocating a probe tensor."""
+
+    try:
+        torch.cuda.init()
+    except RuntimeError:
+        return False
+    return torch.cuda.device_count() > 0
+
+
+@functools.lru_cache(maxsize=8)
 def _select_device(explicit: Optional[str] = None) -> str:
-    """Choose an execution device, falling back gracefully when accelerators fail."""
+    """Choose an execution device, falling back gracefully when accelerators fail.
+
+    The probe result is memoized per override so repeated constructions skip it.
+    """
 
     if explicit:
         choice = explicit.lower()
         if choice in {"cuda", "gpu"}:
             if torch.cuda.is_available():
-                try:
-                    torch.zeros(1).to("cuda")
+                if _cuda_ready():
                     return "cuda"
-                except RuntimeError:
-                    print("[device] CUDA reported available but failed; using CPU instead.", flush=True)
-                    return "cpu"
+                print("[device] CUDA reported available but failed; using CPU instead.", flush=True)
+                return "cpu"
             print("[device] CUDA requested but not available; using CPU instead.", flush=True)
             return "cpu"
         if choice == "mps":
@@ -73,11 +243,9 @@ def _select_device(explicit: Optional[str] = None) -> str:
             return "cpu"
         raise ValueError(f"Unsupported device override '{explicit}'.")
     if torch.cuda.is_available():
-        try:
-            torch.zeros(1).to("cuda")
+        if _cuda_ready():
             return "cuda"
-        except RuntimeError:
-            print("[device] CUDA reported available but failed; using CPU instead.", flush=True)
+        print("[device] CUDA reported available but failed; using CPU instead.", flush=True)
     mps_backend = getattr(torch.backends, "mps", None)
     if mps_backend and torch.backends.mps.is_available():
         try:
@@ -94,27 +262,13 @@ class TransformerAgeAwareClassifier:
     """Wrap a Transformers sequence classifier with age-based policies."""
 
     def __init__(self, model_path: Path, device: Optional[str] = None) -> None:
-        self.model_path = Path(model_path)
-        if not self.model_path.exists():
-            raise FileNotFoundError(f"Model directory {self.model_path} not found")
-
-        self.tokenizer = _load_tokenizer(str(self.model_path))
-        self.model = AutoModelForSequenceClassification.from_pretrained(self.model_path)
-        self.model.eval()
-
-        max_len = getattr(self.tokenizer, "model_max_length", 512)
-        if not isinstance(max_len, int) or max_len <= 0 or max_len > 4096:
-            max_len = 512
-
-        config_max_positions = getattr(self.model.config, "max_position_embeddings", None)
-        if isinstance(config_max_positions, int) and config_max_positions > 2:
-            # Leave room for special tokens so position_ids stay within the embedding table.
-            max_len = min(max_len, config_max_positions - 2)
-
-        self.max_length = max(max_len, 8)
+        self._init_common(model_path)
 
         self.device = _select_device(device)
+        self.dtype = _select_dtype(self.device)
         self._dml_device = None
+        self.model = _load_model(str(self.model_path), self.dtype)
+
         try:
             if self.device == "dml":
                 if torch_directml is None:
@@ -131,80 +285,509 @@ class TransformerAgeAwareClassifier:
             message = str(exc).lower()
             if "hip error" in message or "invalid device function" in message:
                 print("[device] Accelerator failed with HIP error; retrying on CPU.", flush=True)
-                self.device = "cpu"
-                self.model.to(self.device)
+                self._move_to_cpu()
             elif self.device == "cuda" and any(
                 token in message for token in {"cuda", "cublas", "cudnn"}
             ):
                 print("[device] CUDA initialisation failed; retrying on CPU.", flush=True)
-                self.device = "cpu"
-                self.model.to(self.device)
+                self._move_to_cpu()
             elif self.device == "dml" and "directml" in message:
                 print("[device] DirectML initialisation failed; retrying on CPU.", flush=True)
-                self.device = "cpu"
-                self._dml_device = None
-                self.model.to(self.device)
+                self._move_to_cpu()
             else:
                 raise
+        self._target_device = (
+            self._dml_device if self.device == "dml" else torch.device(self.device)
+        )
 
-    def _score_text(self, text: str) -> float:
-        encoded = self.tokenizer(
-            text,
+        quantize = os.getenv("DEHATER_QUANTIZE", "").strip().lower()
+        if quantize == "int8":
+            if self.device == "cpu" and self.dtype == torch.float32:
+                float_model = self.model
+                self.model = _quantize_dynamic_int8(float_model)
+                self.quantized = self.model is not float_model
+            else:
+                print(
+                    "[quantize] DEHATER_QUANTIZE=int8 only applies to FP32 CPU models; "
+                    f"running {self.device}/{self.dtype} unquantized.",
+                    flush=True,
+                )
+        elif quantize:
+            raise ValueError(f"Unsupported DEHATER_QUANTIZE value '{quantize}'.")
+
+        self._optimize_model()
+        if self.device == "cpu":
+            _configure_cpu_runtime()
+            if os.getenv("DEHATER_JIT", "0") == "1" and not self.compiled:
+                self._freeze_for_cpu()
+
+    def _init_common(self, model_path: Path) -> None:
+        """Set up everything that does not depend on the inference backend."""
+        self.model_path = Path(model_path)
+        if not self.model_path.exists():
+            raise FileNotFoundError(f"Model directory {self.model_path} not found")
+
+        self.tokenizer = _load_tokenizer(str(self.model_path))
+        config = AutoConfig.from_pretrained(self.model_path)
+        self.max_length = _resolve_max_length(self.tokenizer, config)
+        self._tok_rust = _fast_backend(self.tokenizer, self.max_length)
+        self._init_score_cache()
+
+        self.quantized = False
+        self.compiled = False
+        # Each thread copies from its own pinned buffers. A scoring call syncs (``.cpu()``)
+        # before returning, so a thread never overwrites a buffer that is still being copied.
+        self._pinned_local = threading.local()
+
+    def _dummy_inputs(
+        self, batch: int = 1, length: Optional[int] = None
+    ) -> Dict[str, torch.Tensor]:
+        shape = (batch, length or self.max_length)
+        return {
+            "input_ids": torch.full(shape, self.tokenizer.pad_token_id or 0, dtype=torch.long),
+            "attention_mask": torch.ones(shape, dtype=torch.long),
+        }
+
+    def _freeze_for_cpu(self) -> None:
+        """Trace and freeze the model so TorchScript can apply oneDNN Graph fusions."""
+
+        dummy = self._dummy_inputs()
+        eager = _LogitsOnly(self.model)
+        # Real tokens, two rows of different length, so the check covers padding and B>1.
+        check = self.encode(
+            ["ทดสอบ", "ตรวจสอบว่าโมเดลที่ trace แล้วยังให้ผลเหมือนเดิมกับประโยคที่ยาวกว่า"]
+        )
+        try:
+            torch.jit.enable_onednn_fusion(True)
+            with torch.no_grad():
+                traced = torch.jit.trace(
+                    eager, (dummy["input_ids"], dummy["attention_mask"]), check_trace=False
+                )
+                frozen = torch.jit.freeze(traced)
+                # oneDNN Graph fuses on the first profiled runs; do them here.
+                for _ in range(2):
+                    frozen(check["input_ids"], check["attention_mask"])
+                expected = eager(check["input_ids"], check["attention_mask"])
+                actual = frozen(check["input_ids"], check["attention_mask"])
+            if not torch.allclose(expected, actual, rtol=1e-3, atol=1e-4):
+                raise RuntimeError("traced logits differ from eager logits on a padded batch")
+        except Exception as exc:
+            torch.jit.enable_onednn_fusion(False)
+            print(f"[optimize] TorchScript freeze failed ({exc}); running eagerly.", flush=True)
+            return
+        self.model = _FrozenClassifier(frozen)
+        print("[optimize] Using frozen TorchScript model with oneDNN fusion.", flush=True)
+
+    def _optimize_model(self) -> None:
+        """Apply the opt-in graph optimizations.
+
+        ``DEHATER_BETTERTRANSFORMER=1`` swaps in fused attention (requires ``optimum``)
+        and ``DEHATER_COMPILE=1`` wraps the model in ``torch.compile``.
+        """
+
+        # BetterTransformer rewrites the encoder layers around their float weights,
+        # which would discard the INT8 linear layers.
+        if os.getenv("DEHATER_BETTERTRANSFORMER", "0") == "1" and not self.quantized:
+            try:
+                self.model = self.model.to_bettertransformer()
+                print("[optimize] Using BetterTransformer fused attention.", flush=True)
+            except Exception as exc:
+                print(f"[optimize] BetterTransformer unavailable ({exc}); using stock layers.", flush=True)
+
+        self.compiled = False
+        if os.getenv("DEHATER_COMPILE", "0") != "1":
+            return
+        if not hasattr(torch, "compile"):
+            print("[optimize] torch.compile unavailable; skipping compilation.", flush=True)
+            return
+        eager_model = self.model
+        try:
+            self.model = torch.compile(eager_model, mode="reduce-overhead", fullgraph=False)
+            # torch.compile is lazy, so compilation (and any failure) happens here. Warming
+            # up now also keeps the first real request from paying for it. Two distinct
+            # shapes make dynamo recompile with dynamic batch/sequence dims, so later batch
+            # shapes reuse that graph. CUDA graphs are still recorded once per new shape.
+            with torch.inference_mode(), _autocast_context(self.device, self.dtype):
+                for batch, length in ((1, self.max_length), (2, max(self.max_length // 2, 8))):
+                    self.model(**self._to_target_device(self._dummy_inputs(batch, length)))
+        except Exception as exc:
+            self.model = eager_model  # the wrapper's _orig_mod
+            print(f"[optimize] torch.compile failed ({exc}); running eagerly.", flush=True)
+            return
+        self.compiled = True
+
+    def _move_to_cpu(self) -> None:
+        """Fall back to FP32 on CPU after an accelerator failure."""
+
+        self.device = "cpu"
+        self.dtype = torch.float32
+        self._dml_device = None
+        self._target_device = torch.device("cpu")
+        self.model.to(self.device, dtype=self.dtype)
+
+    def encode(self, texts: Sequence[str]) -> Dict[str, torch.Tensor]:
+        """Tokenize ``texts`` into padded ``input_ids``/``attention_mask`` tensors."""
+
+        if self._tok_rust is not None:
+            encodings = self._tok_rust.encode_batch(list(texts))
+            return {
+                "input_ids": torch.as_tensor([enc.ids for enc in encodings], dtype=torch.long),
+                "attention_mask": torch.as_tensor(
+                    [enc.attention_mask for enc in encodings], dtype=torch.long
+                ),
+            }
+        # A single text never needs padding, so skip the padding pass for it.
+        return self.tokenizer(
+            list(texts),
             return_tensors="pt",
             truncation=True,
-            padding=True,
+            padding=len(texts) > 1,
             max_length=self.max_length,
         )
-        target_device = self._dml_device if self.device == "dml" else self.device
-        encoded = {k: v.to(target_device) for k, v in encoded.items()}
-        def _autocast_context(device: str):
-            if device == "cuda":
-                return torch.autocast(device_type="cuda", dtype=torch.float16)
-            return nullcontext()
-
-        with torch.no_grad(), _autocast_context(self.device):
+
+    def _to_target_device(self, encoded: Dict[str, torch.Tensor]) -> Dict[str, torch.Tensor]:
+        """Move the model inputs to ``self._target_device``.
+
+        Only ``input_ids`` and ``attention_mask`` are forwarded; the classifiers
+        served here take nothing else.
+        """
+
+        input_ids = encoded["input_ids"]
+        attention_mask = encoded["attention_mask"]
+        if self.device != "cuda":
+            return {
+                "input_ids": input_ids.to(self._target_device),
+                "attention_mask": attention_mask.to(self._target_device),
+            }
+
+        # Stage through pinned host memory so the H2D copy can run asynchronously.
+        return {
+            "input_ids": self._pinned_to_device(input_ids, "input_ids"),
+            "attention_mask": self._pinned_to_device(attention_mask, "attention_mask"),
+        }
+
+    def _pinned_to_device(self, value: torch.Tensor, key: str) -> torch.Tensor:
+        # Single-text batches reuse a preallocated buffer instead of pinning afresh.
+        buffers = getattr(self._pinned_local, "buffers", None)
+        if buffers is None:
+            buffers = {
+                name: torch.empty((1, self.max_length), dtype=torch.long, pin_memory=True)
+                for name in ("input_ids", "attention_mask")
+            }
+            self._pinned_local.buffers = buffers
+        buffer = buffers.get(key)
+        if buffer is not None and value.shape[0] == 1 and value.dtype == buffer.dtype:
+            staged = buffer[:, : value.shape[1]]
+            staged.copy_(value)
+        else:
+            staged = value.pin_memory()
+        return staged.to(self._target_device, non_blocking=True)
+
+    def _init_score_cache(self) -> None:
+        # Scores depend only on the text, so they can be reused across ages.
+        self._score_cache: "OrderedDict[str, float]" = OrderedDict()
+        self._score_cache_size = max(int(os.getenv("DEHATER_SCORE_CACHE", "4096")), 0)
+        self._score_cache_lock = threading.Lock()
+
+    def _score_encoded(self, encoded: Dict[str, torch.Tensor]) -> torch.Tensor:
+        """Run the model and return positive-class probabilities, still on the device.
+
+        Nothing here forces a host sync, so callers decide when to copy back.
+        """
+
+        encoded = self._to_target_device(encoded)
+
+        with torch.inference_mode(), _autocast_context(self.device, self.dtype):
             try:
                 logits = self.model(**encoded).logits
             except RuntimeError as exc:
                 message = str(exc).lower()
                 if "hip error" in message or "invalid device function" in message:
                     print("[device] Runtime HIP failure during inference; switching to CPU.", flush=True)
-                    self.device = "cpu"
-                    self.model.to(self.device)
-                    encoded = {k: v.to(self.device) for k, v in encoded.items()}
-                    with _autocast_context(self.device):
+                    self._move_to_cpu()
+                    encoded = self._to_target_device(encoded)
+                    with _autocast_context(self.device, self.dtype):
                         logits = self.model(**encoded).logits
                 elif self.device == "cuda" and any(
                     token in message for token in {"cuda", "cublas", "cudnn"}
                 ):
                     print("[device] CUDA runtime failure; switching to CPU.", flush=True)
-                    self.device = "cpu"
-                    self.model.to(self.device)
-                    encoded = {k: v.to(self.device) for k, v in encoded.items()}
-                    with _autocast_context(self.device):
+                    self._move_to_cpu()
+                    encoded = self._to_target_device(encoded)
+                    with _autocast_context(self.device, self.dtype):
                         logits = self.model(**encoded).logits
                 elif "directml" in message and self.device == "dml":
                     print("[device] DirectML execution failed; switching to CPU.", flush=True)
-                    self.device = "cpu"
-                    self._dml_device = None
-                    self.model.to(self.device)
-                    encoded = {k: v.to(self.device) for k, v in encoded.items()}
-                    with _autocast_context(self.device):
+                    self._move_to_cpu()
+                    encoded = self._to_target_device(encoded)
+                    with _autocast_context(self.device, self.dtype):
                         logits = self.model(**encoded).logits
                 else:
                     raise
-            probabilities = torch.nn.functional.softmax(logits, dim=-1)
-        return float(probabilities[:, 1].item())
+            logits = logits.float()
+            if logits.shape[-1] == 2:
+                # For two classes softmax(z)[1] == sigmoid(z1 - z0), so skip the full softmax.
+                scores = torch.sigmoid(logits[:, 1] - logits[:, 0])
+            else:
+                scores = torch.nn.functional.softmax(logits, dim=-1)[:, 1]
+        return scores.detach()
+
+    def _score_texts_uncached(self, texts: Sequence[str]) -> List[float]:
+        # One device-to-host copy per batch rather than one ``.item()`` per text.
+        return self._score_encoded(self.encode(texts)).cpu().tolist()
+
+    def _score_texts(self, texts: Sequence[str]) -> List[float]:
+        """Return scores for ``texts``, running the model only on cache misses."""
+
+        if self._score_cache_size == 0:
+            return self._score_texts_uncached(texts)
+
+        scores: List[Optional[float]] = [None] * len(texts)
+        misses: Dict[str, List[int]] = {}
+        with self._score_cache_lock:
+            for index, text in enumerate(texts):
+                cached = self._score_cache.get(text)
+                if cached is None:
+                    misses.setdefault(text, []).append(index)
+                else:
+                    self._score_cache.move_to_end(text)
+                    scores[index] = cached
+
+        if misses:
+            miss_texts = list(misses)
+            fresh = self._score_texts_uncached(miss_texts)
+            with self._score_cache_lock:
+                for text, score in zip(miss_texts, fresh):
+                    for index in misses[text]:
+                        scores[index] = score
+                    self._score_cache[text] = score
+                    self._score_cache.move_to_end(text)
+                while len(self._score_cache) > self._score_cache_size:
+                    self._score_cache.popitem(last=False)
+
+        return scores  # type: ignore[return-value]
+
+    def _score_text(self, text: str) -> float:
+        return self._score_texts([text])[0]
+
+    def classify_batch(
+        self,
+        texts: Sequence[str],
+        age: Union[Optional[int], Sequence[Optional[int]]],
+    ) -> List[Dict[str, Any]]:
+        """Score ``texts`` in a single padded forward pass.
+
+        ``age`` may be a single value applied to every text or a sequence with one
+        age per text, which lets callers coalesce requests from different users.
+        """
+
+        if not texts:
+            return []
+        return self._apply_policies(self._score_texts(texts), age)
+
+    def classify_encoded(
+        self,
+        encoded: Dict[str, torch.Tensor],
+        age: Union[Optional[int], Sequence[Optional[int]]],
+    ) -> List[Dict[str, Any]]:
+        """Like :meth:`classify_batch` for inputs already produced by :meth:`encode`.
+
+        Pre-tokenized inputs bypass the score cache, which is keyed on raw text.
+        """
+
+        return self._apply_policies(self._score_encoded(encoded), age)
+
+    def _apply_policies(
+        self,
+        scores: Union[Sequence[float], torch.Tensor],
+        age: Union[Optional[int], Sequence[Optional[int]]],
+    ) -> List[Dict[str, Any]]:
+        if isinstance(age, (list, tuple)):
+            if len(age) != len(scores):
+                raise ValueError("Expected one age per text when passing a sequence of ages.")
+            ages: Sequence[Optional[int]] = age
+        else:
+            ages = [age] * len(scores)
+
+        # Resolve each distinct age once rather than once per text.
+        by_age = {item_age: resolve_policy(item_age) for item_age in set(ages)}
+        policies = [by_age[item_age] for item_age in ages]
+
+        if isinstance(scores, torch.Tensor):
+            # Scores straight from the model: one host copy, then a single vectorized
+            # comparison. float64 keeps it identical to Python's ``score >= threshold``.
+            score_tensor = scores.detach().to("cpu", torch.float64)
+            thresholds = torch.tensor(
+                [policy.threshold for policy in policies], dtype=torch.float64
+            )
+            blocks = (score_tensor >= thresholds).tolist()
+            values = score_tensor.tolist()
+        else:
+            # Plain floats (cache hits, single texts): a tensor round trip would cost more.
+            values = list(scores)
+            blocks = [score >= policy.threshold for score, policy in zip(values, policies)]
+
+        return [
+            {
+                "score": score,
+                "should_block": should_block,
+                "age_policy": dict(_policy_dict(policy)),
+            }
+            for score, should_block, policy in zip(values, blocks, policies)
+        ]
 
     def classify(self, text: str, age: Optional[int]) -> Dict[str, Any]:
-        score = self._score_text(text)
-        policy: AgePolicy = resolve_policy(age)
-        should_block = score >= policy.threshold
-        return {
-            "score": score,
-            "should_block": should_block,
-            "age_policy": asdict(policy),
-        }
+        return self.classify_batch([text], age)[0]
+
+
+def _checkpoint_mtime(model_path: Path) -> float:
+    """Newest modification time among the checkpoint files, ignoring exported graphs."""
+
+    return max(
+        (
+            entry.stat().st_mtime
+            for entry in model_path.iterdir()
+            if entry.is_file() and entry.suffix != ".onnx"
+        ),
+        default=0.0,
+    )
+
+
+def _is_fresh(artifact: Path, model_path: Path) -> bool:
+    if not artifact.exists():
+        return False
+    if artifact.stat().st_mtime >= _checkpoint_mtime(model_path):
+        return True
+    print(f"[onnx] {artifact.name} is older than the checkpoint; rebuilding.", flush=True)
+    return False
+
+
+def _partial_path(path: Path) -> Path:
+    # Written first and renamed into place, so readers never see a half-written graph.
+    return path.with_name(f".{path.stem}.partial{path.suffix}")
+
+
+class _LogitsOnly(torch.nn.Module):
+    """Expose a Transformers classifier as ``(input_ids, attention_mask) -> logits`` for export."""
+
+    def __init__(self, model: torch.nn.Module) -> None:
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
+        return self.model(input_ids=input_ids, attention_mask=attention_mask).logits
+
+
+class _FrozenClassifier(torch.nn.Module):
+    """Give a frozen ``(input_ids, attention_mask) -> logits`` module the model call shape."""
+
+    def __init__(self, frozen: torch.jit.ScriptModule) -> None:
+        super().__init__()
+        self.frozen = frozen
+
+    def forward(
+        self, input_ids: torch.Tensor, attention_mask: torch.Tensor, **_: Any
+    ) -> SequenceClassifierOutput:
+        return SequenceClassifierOutput(logits=self.frozen(input_ids, attention_mask))
+
+
+class OnnxAgeAwareClassifier(TransformerAgeAwareClassifier):
+    """Serve the same checkpoint through ONNX Runtime with an INT8 graph on CPU.
+
+    ``model.onnx`` and ``model.int8.onnx`` are written next to the checkpoint on
+    first use and reused afterwards.
+    """
+
+    ONNX_FILENAME = "model.onnx"
+    QUANTIZED_FILENAME = "model.int8.onnx"
+
+    def __init__(self, model_path: Path, device: Optional[str] = None) -> None:
+        if ort is None:
+            raise RuntimeError("ONNX backend requested but onnxruntime is not installed.")
+        self._init_common(model_path)
+        if device and device.lower() != "cpu":
+            print(f"[onnx] Ignoring device override '{device}'; ONNX backend runs on CPU.", flush=True)
+
+        self.device = "cpu"
+        self.dtype = torch.float32
+        self._dml_device = None
+        self._target_device = torch.device("cpu")
+        self.model = None
+
+        quantized_path = self.model_path / self.QUANTIZED_FILENAME
+        if not _is_fresh(quantized_path, self.model_path):
+            self._export_quantized(quantized_path)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        # 0 lets ONNX Runtime pick one thread per physical core.
+        options.intra_op_num_threads = int(os.getenv("DEHATER_THREADS", "0"))
+        self._session = ort.InferenceSession(
+            str(quantized_path), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+
+    def _export_quantized(self, quantized_path: Path) -> None:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        onnx_path = self.model_path / self.ONNX_FILENAME
+        if not _is_fresh(onnx_path, self.model_path):
+            print(f"[onnx] Exporting {self.model_path} to {onnx_path}", flush=True)
+            partial_path = _partial_path(onnx_path)
+            model = AutoModelForSequenceClassification.from_pretrained(self.model_path)
+            model.eval()
+            dummy = self.tokenizer(["export"], return_tensors="pt")
+            with torch.no_grad():
+                torch.onnx.export(
+                    _LogitsOnly(model),
+                    (dummy["input_ids"], dummy["attention_mask"]),
+                    str(partial_path),
+                    input_names=["input_ids", "attention_mask"],
+                    output_names=["logits"],
+                    dynamic_axes={
+                        "input_ids": {0: "batch", 1: "sequence"},
+                        "attention_mask": {0: "batch", 1: "sequence"},
+                        "logits": {0: "batch"},
+                    },
+                    opset_version=17,
+                )
+            os.replace(partial_path, onnx_path)
+        print(f"[onnx] Quantizing {onnx_path} to {quantized_path}", flush=True)
+        partial_path = _partial_path(quantized_path)
+        quantize_dynamic(str(onnx_path), str(partial_path), weight_type=QuantType.QInt8)
+        os.replace(partial_path, quantized_path)
+
+    def _score_encoded(self, encoded: Dict[str, torch.Tensor]) -> torch.Tensor:
+        logits = self._session.run(
+            ["logits"],
+            {
+                "input_ids": encoded["input_ids"].numpy(),
+                "attention_mask": encoded["attention_mask"].numpy(),
+            },
+        )[0]
+        logits = logits.astype(np.float64)
+        if logits.shape[-1] == 2:
+            # Same as the torch path: softmax(z)[1] == sigmoid(z1 - z0). Splitting on the
+            # sign keeps exp() from overflowing for large logit gaps.
+            diff = logits[:, 1] - logits[:, 0]
+            exp_neg = np.exp(-np.abs(diff))
+            scores = np.where(diff >= 0, 1.0 / (1.0 + exp_neg), exp_neg / (1.0 + exp_neg))
+        else:
+            shifted = np.exp(logits - logits.max(axis=-1, keepdims=True))
+            scores = shifted[:, 1] / shifted.sum(axis=-1)
+        return torch.from_numpy(scores.astype(np.float32))
+
+
+def load_classifier(
+    model_path: Path, device: Optional[str] = None, backend: str = "torch"
+) -> TransformerAgeAwareClassifier:
+    """Construct the classifier for ``backend`` (``"torch"`` or ``"onnx"``)."""
+
+    choice = (backend or "torch").lower()
+    if choice == "onnx":
+        return OnnxAgeAwareClassifier(model_path, device=device)
+    if choice == "torch":
+        return TransformerAgeAwareClassifier(model_path, device=device)
+    raise ValueError(f"Unsupported backend '{backend}'. Expected one of {', '.join(BACKENDS)}.")
 
 
 def parse_args() -> argparse.Namespace:
@@ -227,12 +810,18 @@ def parse_args() -> argparse.Namespace:
         default=None,
         help="Optional device override (e.g. 'cpu', 'cuda', or 'dml').",
     )
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        default="torch",
+        help="Inference backend: eager PyTorch or ONNX Runtime (default: torch).",
+    )
     return parser.parse_args()
 
 
 def main() -> None:
     args = parse_args()
-    classifier = TransformerAgeAwareClassifier(args.model, device=args.device)
+    classifier = load_classifier(args.model, device=args.device, backend=args.backend)
     result = classifier.classify(args.text, args.age)
     print(result)
 
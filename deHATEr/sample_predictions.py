@@ -3,28 +3,44 @@ from __future__ import annotations
 
 import argparse
 import csv
-import json
+import hashlib
+import os
+from contextlib import ExitStack
 from datetime import datetime
+from itertools import chain, islice
 from pathlib import Path
-from typing import Iterable, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import orjson
+import torch
 
 from age_policy import resolve_policy
-from predict import TransformerAgeAwareClassifier
+from predict import BACKENDS, TransformerAgeAwareClassifier, load_classifier
 
 
 DEFAULT_SENTENCES_PATH = Path(__file__).with_name("sample_sentences.jsonl")
+DEFAULT_BATCH_SIZE = 32
+_CSV_FIELDS = [
+    "index",
+    "text",
+    "score",
+    "should_block",
+    "threshold",
+    "age",
+    "expected",
+    "correct",
+]
 
 
-def _load_jsonl_sentences(path: Path) -> List[dict]:
-    sentences: List[dict] = []
-    with path.open("r", encoding="utf-8") as handle:
+def _iter_jsonl_sentences(path: Path) -> Iterator[dict]:
+    with path.open("rb") as handle:
         for line_number, raw in enumerate(handle, start=1):
             raw = raw.strip()
             if not raw:
                 continue
             try:
-                record = json.loads(raw)
-            except json.JSONDecodeError as exc:  # pragma: no cover - user input errors
+                record = orjson.loads(raw)
+            except orjson.JSONDecodeError as exc:  # pragma: no cover - user input errors
                 raise SystemExit(
                     f"Failed to parse JSON on line {line_number} of {path}: {exc}"
                 ) from exc
@@ -32,36 +48,125 @@ def _load_jsonl_sentences(path: Path) -> List[dict]:
                 raise SystemExit(
                     f"Missing 'text' field on line {line_number} of {path}."
                 )
-            sentences.append({"text": record["text"], "expected": record.get("expected")})
-    return sentences
+            yield {"text": record["text"], "expected": record.get("expected")}
+
+
+def _iter_text_sentences(path: Path) -> Iterator[dict]:
+    with path.open("r", encoding="utf-8") as handle:
+        for line in handle:
+            text = line.strip()
+            if text:
+                yield {"text": text, "expected": None}
 
 
-def _load_default_sentences() -> List[dict]:
+def _iter_default_sentences() -> Iterator[dict]:
     if DEFAULT_SENTENCES_PATH.exists():
-        return _load_jsonl_sentences(DEFAULT_SENTENCES_PATH)
+        return _iter_jsonl_sentences(DEFAULT_SENTENCES_PATH)
     raise SystemExit(
         f"Default sentences file not found. Expected {DEFAULT_SENTENCES_PATH} to exist."
     )
 
 
-def _read_sentences(input_path: Path | None) -> List[dict]:
+def _iter_sentences(input_path: Path | None) -> Iterator[dict]:
     if input_path is None:
-        return _load_default_sentences()
+        return _iter_default_sentences()
     if input_path.suffix.lower() in {".jsonl", ".json"}:
-        return _load_jsonl_sentences(input_path)
-    with input_path.open("r", encoding="utf-8") as handle:
-        return [{"text": line.strip(), "expected": None} for line in handle if line.strip()]
+        return _iter_jsonl_sentences(input_path)
+    return _iter_text_sentences(input_path)
+
+
+def _iter_batches(samples: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    iterator = iter(samples)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _iter_scored(
+    classifier: TransformerAgeAwareClassifier,
+    samples: Iterable[dict],
+    batch_size: int,
+    age: Optional[int],
+) -> Iterator[Tuple[dict, Dict[str, Any]]]:
+    for batch in _iter_batches(samples, batch_size):
+        results = classifier.classify_batch([sample["text"] for sample in batch], age)
+        yield from zip(batch, results)
+
+
+def _tokenizer_fingerprint(classifier: TransformerAgeAwareClassifier) -> str:
+    tokenizer = classifier.tokenizer
+    backend = getattr(tokenizer, "backend_tokenizer", None)
+    if backend is not None:
+        payload = backend.to_str()
+    else:
+        payload = orjson.dumps(tokenizer.get_vocab(), option=orjson.OPT_SORT_KEYS).decode()
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _load_pretokenized(
+    classifier: TransformerAgeAwareClassifier, input_path: Path | None
+) -> Dict[str, Any]:
+    """Load ``<input>.pt`` if it matches the input and tokenizer, otherwise tokenize and save it."""
+
+    # Resolve the reader first so a missing default file exits with the usual message.
+    sentences = _iter_sentences(input_path)
+    source = DEFAULT_SENTENCES_PATH if input_path is None else input_path
+    cache_path = source.with_suffix(".pt")
+    identity = {
+        "model_path": str(classifier.model_path.resolve()),
+        "tokenizer": _tokenizer_fingerprint(classifier),
+        "max_length": classifier.max_length,
+    }
+    if cache_path.exists() and cache_path.stat().st_mtime >= source.stat().st_mtime:
+        bundle = torch.load(cache_path, weights_only=True)
+        if all(bundle.get(key) == value for key, value in identity.items()):
+            return bundle
+        print(f"Ignoring {cache_path}: it was built for a different model or tokenizer.")
+
+    samples = list(sentences)
+    if not samples:
+        raise SystemExit("No sentences provided for scoring.")
+    texts = [sample["text"] for sample in samples]
+    encoded = classifier.encode(texts)
+    bundle = {
+        "input_ids": encoded["input_ids"],
+        "attention_mask": encoded["attention_mask"],
+        "texts": texts,
+        "expected": [sample["expected"] for sample in samples],
+        **identity,
+    }
+    # Write aside and swap in, so an interrupted run never leaves a truncated cache.
+    partial_path = cache_path.with_name(f".{cache_path.stem}.partial{cache_path.suffix}")
+    torch.save(bundle, partial_path)
+    os.replace(partial_path, cache_path)
+    print(f"Saved pre-tokenized inputs to {cache_path}")
+    return bundle
 
 
-def _write_csv(rows: Iterable[dict], output_path: Path) -> None:
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    rows = list(rows)
-    if not rows:
-        return
-    with output_path.open("w", newline="", encoding="utf-8") as handle:
-        writer = csv.DictWriter(handle, fieldnames=rows[0].keys())
-        writer.writeheader()
-        writer.writerows(rows)
+def _iter_scored_pretokenized(
+    classifier: TransformerAgeAwareClassifier,
+    bundle: Dict[str, Any],
+    batch_size: int,
+    age: Optional[int],
+) -> Iterator[Tuple[dict, Dict[str, Any]]]:
+    input_ids = bundle["input_ids"]
+    attention_mask = bundle["attention_mask"]
+    for start in range(0, len(bundle["texts"]), batch_size):
+        stop = start + batch_size
+        mask = attention_mask[start:stop]
+        # The bundle is padded to the longest sentence overall; drop columns that
+        # are padding for every row in this slice.
+        keep = mask.any(dim=0)
+        encoded = {"input_ids": input_ids[start:stop][:, keep], "attention_mask": mask[:, keep]}
+        results = classifier.classify_encoded(encoded, age)
+        for offset, result in enumerate(results):
+            sample = {
+                "text": bundle["texts"][start + offset],
+                "expected": bundle["expected"][start + offset],
+            }
+            yield sample, result
 
 
 def parse_args() -> argparse.Namespace:
@@ -83,6 +188,26 @@ def parse_args() -> argparse.Namespace:
         default=None,
         help="Optional device override such as 'cpu', 'cuda', or 'dml'.",
     )
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        default="torch",
+        help="Inference backend: eager PyTorch or ONNX Runtime (default: torch).",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"Number of sentences scored per forward pass (default: {DEFAULT_BATCH_SIZE}).",
+    )
+    parser.add_argument(
+        "--pretokenized",
+        action="store_true",
+        help=(
+            "Reuse tokenized inputs from a sibling .pt file (created on first use) "
+            "so repeated runs time only the model."
+        ),
+    )
     parser.add_argument(
         "--input",
         type=Path,
@@ -112,6 +237,8 @@ def parse_args() -> argparse.Namespace:
 
 def main() -> None:
     args = parse_args()
+    if args.batch_size < 1:
+        raise SystemExit("--batch-size must be at least 1.")
     log_path: Optional[Path] = None
     log_lines: List[str] = []
 
@@ -130,55 +257,68 @@ def main() -> None:
         if log_path is not None:
             log_lines.append(message)
 
-    sentences = _read_sentences(args.input)
+    if args.pretokenized:
+        classifier = load_classifier(args.model, device=args.device, backend=args.backend)
+        bundle = _load_pretokenized(classifier, args.input)
+        scored = _iter_scored_pretokenized(classifier, bundle, args.batch_size, args.age)
+    else:
+        sentences = _iter_sentences(args.input)
+        first = next(sentences, None)
+        if first is None:
+            raise SystemExit("No sentences provided for scoring.")
 
-    if not sentences:
-        raise SystemExit("No sentences provided for scoring.")
+        classifier = load_classifier(args.model, device=args.device, backend=args.backend)
+        scored = _iter_scored(classifier, chain([first], sentences), args.batch_size, args.age)
 
-    classifier = TransformerAgeAwareClassifier(args.model, device=args.device)
     policy = resolve_policy(args.age)
 
     emit(f"Using age policy: {policy}")
 
-    rows = []
     correct = 0
     total_with_labels = 0
 
-    for idx, sample in enumerate(sentences, start=1):
-        text = sample["text"]
-        expected = sample.get("expected")
-
-        result = classifier.classify(text, args.age)
-        score = result["score"]
-        should_block = result["should_block"]
-        is_correct = expected is not None and expected == should_block
-        if expected is not None:
-            total_with_labels += 1
-            if is_correct:
-                correct += 1
-
-        expected_str = "?" if expected is None else str(expected)
-        emit(
-            f"{idx:02d}. score={score:.4f} block={should_block} expected={expected_str} text={text}"
-        )
-        rows.append(
-            {
-                "index": idx,
-                "text": text,
-                "score": score,
-                "should_block": should_block,
-                "threshold": policy.threshold,
-                "age": args.age,
-                "expected": expected,
-                "correct": is_correct if expected is not None else None,
-            }
-        )
+    with ExitStack() as stack:
+        writer: Optional[csv.DictWriter] = None
+        if args.output is not None:
+            args.output.parent.mkdir(parents=True, exist_ok=True)
+            handle = stack.enter_context(args.output.open("w", newline="", encoding="utf-8"))
+            writer = csv.DictWriter(handle, fieldnames=_CSV_FIELDS)
+            writer.writeheader()
+
+        for idx, (sample, result) in enumerate(scored, start=1):
+            text = sample["text"]
+            expected = sample.get("expected")
+
+            score = result["score"]
+            should_block = result["should_block"]
+            is_correct = expected is not None and expected == should_block
+            if expected is not None:
+                total_with_labels += 1
+                if is_correct:
+                    correct += 1
+
+            expected_str = "?" if expected is None else str(expected)
+            emit(
+                f"{idx:02d}. score={score:.4f} block={should_block} expected={expected_str} text={text}"
+            )
+            if writer is not None:
+                writer.writerow(
+                    {
+                        "index": idx,
+                        "text": text,
+                        "score": score,
+                        "should_block": should_block,
+                        "threshold": policy.threshold,
+                        "age": args.age,
+                        "expected": expected,
+                        "correct": is_correct if expected is not None else None,
+                    }
+                )
 
     if total_with_labels:
         emit(f"Accuracy: {correct}/{total_with_labels}")
 
     if args.output is not None:
-        _write_csv(rows, args.output)
         emit(f"Saved results to {args.output}")
 
     if log_path is not None and log_lines: